@@ -0,0 +1,233 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from groq import APIConnectionError, APIStatusError
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Smoothing for the short-term and baseline latency averages
+SHORT_ALPHA = 0.2
+BASELINE_ALPHA = 0.02
+
+# Multiplicative decrease applied when upstream latency degrades
+DECREASE_FACTOR = 0.8
+
+MAX_RETRY_AFTER = 60
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed instead of admitted"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Server is overloaded, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class AdaptiveLimit:
+    """AIMD concurrency limit driven by observed upstream latency"""
+
+    def __init__(self, initial: int, min_limit: int, max_limit: int, tolerance: float,
+                 clock: Callable[[], float] = time.monotonic):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.short_latency: Optional[float] = None
+        self.baseline_latency: Optional[float] = None
+        self._clock = clock
+        self._last_decrease = 0.0
+
+    @property
+    def current(self) -> int:
+        return int(self.limit)
+
+    def update(self, latency: Optional[float], in_flight: int, failed: bool) -> None:
+        """Feed one upstream call's latency (None if it never completed) into the limit"""
+        if latency is not None:
+            if self.short_latency is None:
+                self.short_latency = self.baseline_latency = latency
+            else:
+                self.short_latency += SHORT_ALPHA * (latency - self.short_latency)
+                self.baseline_latency += BASELINE_ALPHA * (latency - self.baseline_latency)
+
+        now = self._clock()
+        slow = self.short_latency is not None and self.short_latency > self.baseline_latency * self.tolerance
+
+        if failed or slow:
+            # Back off at most once per latency period so one slow burst isn't counted repeatedly
+            if now - self._last_decrease >= (self.short_latency or 0.0):
+                self.limit = max(self.min_limit, self.limit * DECREASE_FACTOR)
+                self._last_decrease = now
+                if failed:
+                    reason = "Upstream error"
+                else:
+                    reason = f"Upstream latency {self.short_latency:.2f}s vs baseline {self.baseline_latency:.2f}s"
+                logger.warning(f"{reason} — concurrency limit lowered to {self.current}")
+        elif in_flight + 1 >= self.current:
+            # Only grow when the current limit is actually being used
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+
+class AdmissionController:
+    """
+    Admits requests up to an adaptive concurrency limit
+
+    Requests over the limit wait in a short bounded queue ordered by weighted
+    fair (start-time) tags per tenant, so one heavy tenant can't starve the rest.
+    Requests that find the queue full or wait too long are shed.
+    """
+
+    def __init__(self, limit: AdaptiveLimit, max_queue: int, max_wait: float,
+                 weights: Optional[Dict[str, float]] = None):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.weights = weights or {}
+        self.in_flight = 0
+        self.shed = 0
+        self._waiting: List[list] = []
+        self._tenant_tags: Dict[str, float] = {}
+        self._virtual_time = 0.0
+        self._sequence = itertools.count()
+
+    @classmethod
+    def from_settings(cls) -> "AdmissionController":
+        """Create a controller from application configuration"""
+        return cls(
+            AdaptiveLimit(
+                initial=settings.admission_initial_limit,
+                min_limit=settings.admission_min_limit,
+                max_limit=settings.admission_max_limit,
+                tolerance=settings.admission_latency_tolerance,
+            ),
+            max_queue=settings.admission_max_queue,
+            max_wait=settings.admission_max_wait,
+            weights=parse_weights(settings.admission_tenant_weights),
+        )
+
+    def retry_after(self) -> int:
+        """Seconds a shed client should wait, from queue depth and current latency"""
+        latency = self.limit.short_latency or 1.0
+        backlog = (len(self._waiting) + self.in_flight) / max(1, self.limit.current)
+        return max(1, min(MAX_RETRY_AFTER, math.ceil(latency * backlog)))
+
+    def _reject(self) -> AdmissionRejected:
+        self.shed += 1
+        return AdmissionRejected(self.retry_after())
+
+    async def acquire(self, tenant: str) -> None:
+        """Wait for an admission slot or raise AdmissionRejected"""
+        if self.in_flight < self.limit.current and not self._waiting:
+            self.in_flight += 1
+            return
+
+        if len(self._waiting) >= self.max_queue:
+            raise self._reject()
+
+        tag = max(self._virtual_time, self._tenant_tags.get(tenant, 0.0)) + 1 / self.weights.get(tenant, 1.0)
+        self._tenant_tags[tenant] = tag
+        granted = asyncio.get_running_loop().create_future()
+        entry = [tag, next(self._sequence), granted]
+        heapq.heappush(self._waiting, entry)
+
+        try:
+            await asyncio.wait({granted}, timeout=self.max_wait)
+        except asyncio.CancelledError:
+            self._abandon(entry)
+            raise
+
+        if not granted.done():
+            self._abandon(entry)
+            raise self._reject()
+
+    def _abandon(self, entry: list) -> None:
+        granted = entry[2]
+        if granted.done():
+            # The slot was handed over just as the waiter gave up
+            self.release(None, failed=False)
+            return
+        granted.cancel()
+        self._waiting.remove(entry)
+        heapq.heapify(self._waiting)
+
+    def release(self, latency: Optional[float], failed: bool) -> None:
+        """Free a slot, update the limit and admit queued requests that now fit"""
+        self.in_flight -= 1
+        if latency is not None or failed:
+            self.limit.update(latency, self.in_flight, failed)
+
+        while self._waiting and self.in_flight < self.limit.current:
+            tag, _, granted = heapq.heappop(self._waiting)
+            self._virtual_time = tag
+            self.in_flight += 1
+            granted.set_result(None)
+
+        if not self._waiting and len(self._tenant_tags) > self.max_queue:
+            # Tags at or behind virtual time carry no priority, so idle tenants can be forgotten
+            self._tenant_tags = {t: v for t, v in self._tenant_tags.items() if v > self._virtual_time}
+
+    @asynccontextmanager
+    async def slot(self, tenant: str, upstream_latency: Callable[[], Optional[float]]):
+        """
+        Hold an admission slot for the duration of the block
+
+        upstream_latency reports how long the block's upstream call took, so retry
+        backoff and local work don't count as upstream slowness.
+        """
+        await self.acquire(tenant)
+        failed = False
+        try:
+            yield
+        except Exception as e:
+            failed = is_overload_error(e)
+            raise
+        finally:
+            self.release(upstream_latency(), failed)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Admission state for health reporting"""
+        return {
+            "limit": self.limit.current,
+            "in_flight": self.in_flight,
+            "queued": len(self._waiting),
+            "shed": self.shed,
+            "latency": round(self.limit.short_latency or 0.0, 3),
+            "baseline_latency": round(self.limit.baseline_latency or 0.0, 3),
+        }
+
+
+def is_overload_error(exc: Exception) -> bool:
+    """
+    Whether an error signals upstream overload
+
+    Auth, validation and rate-limit errors are tied to the caller's own key, so
+    they must not shrink the limit shared by every tenant.
+    """
+    if isinstance(exc, APIStatusError):
+        return exc.status_code >= 500
+    return isinstance(exc, (APIConnectionError, asyncio.TimeoutError))
+
+
+def parse_weights(value: str) -> Dict[str, float]:
+    """Parse 'key_hash:weight,...' into a weight map"""
+    weights = {}
+    for item in value.split(","):
+        if ":" not in item:
+            continue
+        tenant, weight = item.rsplit(":", 1)
+        try:
+            weights[tenant.strip()] = max(0.01, float(weight))
+        except ValueError:
+            logger.warning(f"Ignoring invalid admission weight: {item!r}")
+    return weights
+
+
+admission = AdmissionController.from_settings()
@@ -1,8 +1,10 @@
 import os
-from typing import List
+from typing import List, Optional
 
 from pydantic_settings import BaseSettings
 
+from app.models_config import MAX_CONTEXT_WINDOW
+
 
 class Settings(BaseSettings):
     """Application configuration"""
@@ -14,6 +16,29 @@ class Settings(BaseSettings):
     rate_limit_per_minute: int = 20
     default_groq_model: str = "llama-3.3-70b-versatile"
     log_level: str = "INFO"
+    traffic_capture_path: Optional[str] = None
+    groq_base_url: Optional[str] = None
+    # Roughly 4 bytes of text per token: larger uploads can't fit any model's context window
+    max_upload_bytes: int = MAX_CONTEXT_WINDOW * 4
+
+    # Admission control in front of request processing
+    admission_initial_limit: int = 20
+    admission_min_limit: int = 2
+    admission_max_limit: int = 200
+    admission_max_queue: int = 50
+    admission_max_wait: float = 2.0
+    admission_latency_tolerance: float = 2.0
+    admission_tenant_weights: str = ""
+
+    # Production server (python -m app.server)
+    web_concurrency: int = 0
+    worker_max_requests: int = 1000
+    worker_max_requests_jitter: int = 100
+    worker_max_rss_mb: int = 0
+    worker_timeout: int = 120
+    graceful_timeout: int = 30
+    keepalive_timeout: int = 5
+    preload_crewai: bool = False
 
     @property
     def cors_origins_list(self) -> List[str]:
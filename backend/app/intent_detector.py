@@ -1,5 +1,5 @@
 import re
-from typing import Tuple
+from typing import Optional, Tuple
 
 from app.models import IntentType
 
@@ -40,14 +40,12 @@ class IntentDetector:
         Returns:
             Tuple of (intent, confidence_score)
         """
-        text_lower = text.lower()
-
-        # Check each intent pattern
+        # Check each intent pattern (case-insensitive, so no lowercased copy is needed)
         scores = {}
         for intent, patterns in cls.PATTERNS.items():
             score = 0
             for pattern in patterns:
-                if re.search(pattern, text_lower, re.IGNORECASE):
+                if re.search(pattern, text, re.IGNORECASE):
                     score += 1
             if score > 0:
                 scores[intent] = score / len(patterns)
@@ -72,3 +70,12 @@ class IntentDetector:
             IntentType.CUSTOM: "You are a highly capable AI assistant with expertise in natural language processing. Understand the user's request and provide accurate, helpful, and comprehensive responses. You can handle any NLP task including but not limited to: text analysis, content generation, question answering, data extraction, code generation, creative writing, problem solving, and more. Adapt your response style and depth based on the specific request.",
         }
         return prompts.get(intent, prompts[IntentType.CUSTOM])
+
+    @classmethod
+    def get_structured_prompt(cls, intent: IntentType) -> Optional[str]:
+        """Get compact JSON-mode system prompt, or None if intent has no structured form"""
+        prompts = {
+            IntentType.SENTIMENT: 'Classify the sentiment of the text. Reply with JSON only: {"label": "positive"|"negative"|"neutral", "score": <confidence 0-1>}',
+            IntentType.ENTITY_EXTRACTION: 'Extract named entities from the text. Reply with JSON only: {"entities": [{"text": <exact text>, "type": "person"|"organization"|"location"|"date"|"other"}]}',
+        }
+        return prompts.get(intent)
@@ -1,6 +1,7 @@
 import logging
 import time
 from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional, Tuple
 
 from fastapi import FastAPI, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
@@ -8,11 +9,17 @@ from fastapi.responses import JSONResponse
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from slowapi.util import get_remote_address
+from starlette.datastructures import UploadFile
 
+from app.admission import AdmissionRejected, admission
 from app.config import settings
-from app.models import ErrorResponse, ProcessRequest, ProcessResponse
+from app.intent_detector import IntentDetector
+from app.models import ErrorResponse, IntentType, ProcessOptions, ProcessRequest, ProcessResponse
 from app.models_config import GROQ_MODELS
-from app.processor import NLPProcessor
+from app.processor import NLPProcessor, UpstreamResponseError
+from app.traffic_capture import TrafficRecorder, create_recorder, fingerprint
+from app.uploads import DETECTION_PREFIX_CHARS, UploadTooLarge, read_text, spool_request_body
+from app.worker_health import WorkerLoadMiddleware, worker_health
 
 # Configure logging
 logging.basicConfig(
@@ -21,6 +28,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Allowance for multipart boundaries and form fields on top of the upload limit
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
 # Rate limiter
 limiter = Limiter(key_func=get_remote_address)
 
@@ -29,7 +39,11 @@ limiter = Limiter(key_func=get_remote_address)
 async def lifespan(app: FastAPI):
     """Application lifespan handler"""
     logger.info("Starting Universal NLP Interface API")
+    app.state.traffic_recorder = create_recorder(settings.traffic_capture_path)
+    worker_health.install_drain_hook()
     yield
+    if app.state.traffic_recorder:
+        app.state.traffic_recorder.close()
     logger.info("Shutting down Universal NLP Interface API")
 
 
@@ -45,6 +59,9 @@ app = FastAPI(
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
+# Per-worker load tracking for /health and memory-based recycling
+app.add_middleware(WorkerLoadMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -67,6 +84,24 @@ async def log_requests(request: Request, call_next):
     return response
 
 
+@app.middleware("http")
+async def capture_traffic(request: Request, call_next):
+    """Record redacted request shape for replay when traffic capture is enabled"""
+    recorder = getattr(request.app.state, "traffic_recorder", None)
+    if recorder is None:
+        return await call_next(request)
+
+    started = time.time()
+    response = await call_next(request)
+    capture = getattr(request.state, "capture", None)
+    if capture is not None:
+        recorder.record(
+            request.method, request.url.path, response.status_code,
+            started, time.time() - started, capture
+        )
+    return response
+
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -79,12 +114,18 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Detailed health check"""
-    return {
-        "status": "healthy",
-        "timestamp": time.time(),
-        "environment": settings.environment
-    }
+    """Detailed health check (503 while draining, so load balancers stop routing here)"""
+    worker = worker_health.snapshot()
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE if worker["draining"] else status.HTTP_200_OK,
+        content={
+            "status": "draining" if worker["draining"] else "healthy",
+            "timestamp": time.time(),
+            "environment": settings.environment,
+            "worker": worker,
+            "admission": admission.snapshot()
+        }
+    )
 
 
 @app.get("/api/models")
@@ -105,6 +146,63 @@ async def list_models():
     }
 
 
+async def run_processor(
+    request: Request,
+    text: str,
+    api_key: str,
+    model: Optional[str],
+    options: Dict[str, Any],
+    detected: Optional[Tuple[IntentType, float]] = None
+) -> ProcessResponse:
+    """Run NLPProcessor for an endpoint, recording traffic and mapping errors to HTTP responses"""
+    if getattr(request.app.state, "traffic_recorder", None):
+        content_type = request.headers.get("content-type", "application/json").split(";")[0].strip()
+        request.state.capture = TrafficRecorder.describe_request(text, api_key, model, options, content_type)
+
+    try:
+        # Create processor with user's API key and selected model
+        processor = NLPProcessor(api_key=api_key, model=model)
+
+        # Process the request once admitted; shed with 503 under overload
+        async with admission.slot(fingerprint(api_key), lambda: processor.upstream_latency):
+            result = await processor.process(
+                text=text,
+                options=options,
+                detected=detected
+            )
+
+        if getattr(request.state, "capture", None) is not None:
+            request.state.capture.update(TrafficRecorder.describe_response(result))
+
+        return result
+
+    except AdmissionRejected as e:
+        logger.warning(f"Request shed: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except UpstreamResponseError as e:
+        logger.error(f"Upstream response error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=str(e)
+        )
+    except ValueError as e:
+        logger.warning(f"Validation error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Processing error: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred while processing your request"
+        )
+
+
 @app.post(
     "/api/process",
     response_model=ProcessResponse,
@@ -112,6 +210,8 @@ async def list_models():
         400: {"model": ErrorResponse},
         429: {"model": ErrorResponse},
         500: {"model": ErrorResponse},
+        502: {"model": ErrorResponse},
+        503: {"model": ErrorResponse},
     }
 )
 @limiter.limit(f"{settings.rate_limit_per_minute}/minute")
@@ -123,30 +223,87 @@ async def process_text(request: Request, payload: ProcessRequest):
     - Routes to appropriate crewAI agent or Groq model
     - Returns processed result with metadata
     """
-    try:
-        # Create processor with user's API key and selected model
-        processor = NLPProcessor(api_key=payload.api_key, model=payload.model)
+    return await run_processor(
+        request, payload.text, payload.api_key, payload.model, payload.options.model_dump()
+    )
 
-        # Process the request
-        result = await processor.process(
-            text=payload.text,
-            options=payload.options.model_dump()
-        )
 
-        return result
+@app.post(
+    "/api/process/upload",
+    response_model=ProcessResponse,
+    responses={
+        400: {"model": ErrorResponse},
+        413: {"model": ErrorResponse},
+        415: {"model": ErrorResponse},
+        429: {"model": ErrorResponse},
+        500: {"model": ErrorResponse},
+        502: {"model": ErrorResponse},
+        503: {"model": ErrorResponse},
+    }
+)
+@limiter.limit(f"{settings.rate_limit_per_minute}/minute")
+async def process_upload(request: Request):
+    """
+    Process a large document streamed as multipart/form-data or text/plain
+
+    - multipart: `file` part plus `api_key`, `model` and JSON `options` form fields
+    - text/plain: the body is the text; API key in the `X-Groq-Api-Key` header,
+      `model` and JSON `options` as query parameters
+    - The body is spooled to a temp file and intent is detected from its prefix
+    """
+    content_type = request.headers.get("content-type", "")
+    max_bytes = settings.max_upload_bytes
 
+    try:
+        if content_type.startswith("multipart/form-data"):
+            declared = request.headers.get("content-length")
+            if declared and declared.isdigit() and int(declared) > max_bytes + MULTIPART_OVERHEAD_BYTES:
+                raise UploadTooLarge(f"Upload exceeds the {max_bytes}-byte limit")
+            form = await request.form(max_files=1)
+            try:
+                upload = form.get("file")
+                if not isinstance(upload, UploadFile):
+                    raise ValueError("Missing 'file' upload")
+                text = read_text(upload.file, max_bytes)
+                fields = {key: form.get(key) for key in ("api_key", "model", "options")}
+            finally:
+                await form.close()
+        elif content_type.startswith("text/plain"):
+            spool = await spool_request_body(request, max_bytes)
+            with spool:
+                text = read_text(spool, max_bytes)
+            fields = {
+                "api_key": request.headers.get("x-groq-api-key"),
+                "model": request.query_params.get("model"),
+                "options": request.query_params.get("options"),
+            }
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Upload must be multipart/form-data or text/plain"
+            )
+
+        api_key = fields["api_key"]
+        if not isinstance(api_key, str) or not api_key.startswith("gsk_"):
+            raise ValueError("Invalid Groq API key format")
+        if not text or text.isspace():
+            raise ValueError("Text cannot be empty")
+        options = ProcessOptions.model_validate_json(fields["options"] or "{}").model_dump()
+
+    except UploadTooLarge as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
     except ValueError as e:
         logger.warning(f"Validation error: {e}")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
-    except Exception as e:
-        logger.error(f"Processing error: {e}", exc_info=True)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="An error occurred while processing your request"
-        )
+
+    detected = IntentDetector.detect(text[:DETECTION_PREFIX_CHARS])
+    return await run_processor(request, text, api_key, fields["model"] or None, options, detected)
 
 
 @app.exception_handler(HTTPException)
@@ -157,7 +314,8 @@ async def http_exception_handler(request: Request, exc: HTTPException):
         content={
             "error": exc.detail,
             "code": f"HTTP_{exc.status_code}"
-        }
+        },
+        headers=exc.headers
     )
 
 
@@ -175,6 +333,7 @@ async def general_exception_handler(request: Request, exc: Exception):
 
 
 if __name__ == "__main__":
+    # Development server; use `python -m app.server` for multi-worker production serving
     import uvicorn
     uvicorn.run(
         "app.main:app",
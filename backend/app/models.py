@@ -1,5 +1,5 @@
 from enum import Enum
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Literal, Optional, Union
 
 from pydantic import BaseModel, Field, field_validator
 
@@ -21,6 +21,7 @@ class ProcessOptions(BaseModel):
     top_p: Optional[float] = None
     enable_search: bool = False
     enable_code: bool = False
+    structured_output: bool = False
 
 
 class ProcessRequest(BaseModel):
@@ -47,12 +48,43 @@ class ProcessRequest(BaseModel):
         return v
 
 
+class SentimentResult(BaseModel):
+    """Structured sentiment classification"""
+    label: Literal["positive", "negative", "neutral"] = Field(..., description="Sentiment label")
+    score: float = Field(..., ge=0.0, le=1.0, description="Confidence in the label")
+
+
+class Entity(BaseModel):
+    """Named entity located in the input text"""
+    text: str = Field(..., min_length=1, description="Entity surface text")
+    type: str = Field(..., description="Entity type (person, organization, location, date, ...)")
+    start: Optional[int] = Field(None, description="Start offset in the input text")
+    end: Optional[int] = Field(None, description="End offset in the input text")
+
+
+class EntityExtractionResult(BaseModel):
+    """Structured entity extraction result"""
+    entities: List[Entity] = Field(default_factory=list, description="Extracted entities")
+
+
+class TokenUsage(BaseModel):
+    """Token accounting for a processed request"""
+    prompt_tokens: int = Field(0, description="Tokens in the system prompt and input")
+    completion_tokens: int = Field(0, description="Tokens in the generated result")
+    total_tokens: int = Field(0, description="Prompt plus completion tokens")
+    estimated: bool = Field(False, description="Whether counts come from the local tokenizer")
+
+
 class ProcessResponse(BaseModel):
     """Response model for NLP processing"""
     intent: str = Field(..., description="Detected intent")
     result: str = Field(..., description="Processing result")
     model: str = Field(..., description="Model used")
     tokens_used: Optional[int] = Field(None, description="Tokens consumed")
+    usage: Optional[TokenUsage] = Field(None, description="Prompt and completion token breakdown")
+    structured: Optional[Union[SentimentResult, EntityExtractionResult]] = Field(
+        None, description="Typed result when structured output is requested"
+    )
     processing_time: float = Field(..., description="Processing time in seconds")
     metadata: Optional[Dict[str, Any]] = Field(default_factory=dict, description="Additional metadata")
 
@@ -5,6 +5,8 @@ GROQ_MODELS = {
         "name": "GPT OSS 120B",
         "description": "Most powerful model with reasoning and tools support",
         "max_tokens": 65536,
+        "context_window": 131072,
+        "tokenizer": "o200k",
         "supports_reasoning": True,
         "supports_tools": True,
         "default_temperature": 1.0,
@@ -13,6 +15,8 @@ GROQ_MODELS = {
         "name": "Llama 3.3 70B Versatile",
         "description": "Most versatile model for complex tasks",
         "max_tokens": 32768,
+        "context_window": 131072,
+        "tokenizer": "llama3",
         "supports_reasoning": False,
         "supports_tools": False,
         "default_temperature": 1.0,
@@ -21,6 +25,8 @@ GROQ_MODELS = {
         "name": "Llama 3.1 70B Versatile",
         "description": "High performance model with large context",
         "max_tokens": 32768,
+        "context_window": 131072,
+        "tokenizer": "llama3",
         "supports_reasoning": False,
         "supports_tools": False,
         "default_temperature": 1.0,
@@ -29,6 +35,8 @@ GROQ_MODELS = {
         "name": "Llama 3.1 8B Instant",
         "description": "Extremely fast for simple tasks",
         "max_tokens": 8192,
+        "context_window": 131072,
+        "tokenizer": "llama3",
         "supports_reasoning": False,
         "supports_tools": False,
         "default_temperature": 1.0,
@@ -37,6 +45,8 @@ GROQ_MODELS = {
         "name": "Mixtral 8x7B",
         "description": "High-quality Mixture of Experts model",
         "max_tokens": 32768,
+        "context_window": 32768,
+        "tokenizer": "mistral",
         "supports_reasoning": False,
         "supports_tools": False,
         "default_temperature": 0.7,
@@ -45,6 +55,8 @@ GROQ_MODELS = {
         "name": "Gemma 2 9B IT",
         "description": "Efficient and high-quality model from Google",
         "max_tokens": 8192,
+        "context_window": 8192,
+        "tokenizer": "gemma",
         "supports_reasoning": False,
         "supports_tools": False,
         "default_temperature": 1.0,
@@ -53,6 +65,9 @@ GROQ_MODELS = {
 
 DEFAULT_MODEL = "llama-3.3-70b-versatile"
 
+# Largest context window of any supported model, in tokens
+MAX_CONTEXT_WINDOW = max(config["context_window"] for config in GROQ_MODELS.values())
+
 
 def get_model_config(model_name: str):
     """Get configuration for a specific model"""
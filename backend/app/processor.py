@@ -1,18 +1,40 @@
 import asyncio
 import logging
 import time
-from typing import Any, Dict
+from typing import Any, Awaitable, Dict, List, Optional, Tuple, TypeVar
 
 from groq import AsyncGroq
+from pydantic import ValidationError
 
 from app.config import settings
 from app.intent_detector import IntentDetector
-from app.models import IntentType, ProcessResponse
+from app.models import EntityExtractionResult, IntentType, ProcessResponse, SentimentResult, TokenUsage
 from app.models_config import get_model_config, is_valid_model
 from app.retry_handler import RetryHandler
+from app.token_counter import TokenCounter
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar('T')
+
+# Typed results and completion caps for structured (JSON mode) output
+STRUCTURED_RESULTS = {
+    IntentType.SENTIMENT: SentimentResult,
+    IntentType.ENTITY_EXTRACTION: EntityExtractionResult,
+}
+SENTIMENT_MAX_TOKENS = 32
+ENTITY_MIN_TOKENS = 64
+ENTITY_MAX_TOKENS = 1024
+
+# Reasoning models spend hidden tokens before answering; keep that short and budget for it
+STRUCTURED_REASONING_EFFORT = "low"
+STRUCTURED_REASONING_TOKENS = 512
+
+
+class UpstreamResponseError(Exception):
+    """Raised when the model returns output that can't be used (not retried)"""
+
+
 # crewAI and its heavy dependencies are imported lazily to keep the serverless
 # function bootable even when the full dependency tree isn't available (e.g. Vercel).
 _crewai_available = None
@@ -36,7 +58,7 @@ class NLPProcessor:
 
     def __init__(self, api_key: str, model: str = None):
         self.api_key = api_key
-        self.groq_client = AsyncGroq(api_key=api_key)
+        self.groq_client = AsyncGroq(api_key=api_key, base_url=settings.groq_base_url)
 
         # Validate and set model
         if model and is_valid_model(model):
@@ -46,30 +68,67 @@ class NLPProcessor:
 
         self.model_config = get_model_config(self.model)
 
-    async def process(self, text: str, options: Dict[str, Any]) -> ProcessResponse:
+        # Path that produced the result ("crew", "groq" or "structured"), for traffic capture
+        self.route = None
+
+        # Duration of the latest upstream call (excluding retry backoff), for admission control
+        self.upstream_latency = None
+
+    async def process(
+        self, text: str, options: Dict[str, Any], detected: Optional[Tuple[IntentType, float]] = None
+    ) -> ProcessResponse:
         """Process text with automatic intent detection and routing"""
         start_time = time.time()
 
-        # Detect intent
-        intent, confidence = IntentDetector.detect(text)
+        # Detect intent (callers may pass one detected from a prefix of large inputs)
+        intent, confidence = detected or IntentDetector.detect(text)
         logger.info(f"Intent detected: {intent.value} (confidence: {confidence:.2f})")
 
+        structured = options.get("structured_output") and intent in STRUCTURED_RESULTS
+        if structured:
+            system_prompt = IntentDetector.get_structured_prompt(intent)
+        else:
+            system_prompt = IntentDetector.get_system_prompt(intent)
+
+        # Budget tokens before calling upstream so oversized inputs fail fast (not retried)
+        prompt_tokens = TokenCounter.count_messages(
+            self.model,
+            [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": text},
+            ]
+        )
+        requested = options.get("max_tokens")
+        if requested is None:
+            requested = TokenCounter.default_max_tokens(self.model, intent, prompt_tokens)
+        if structured:
+            requested = self._structured_max_tokens(intent, prompt_tokens, requested)
+            if self.model_config["supports_reasoning"]:
+                requested += STRUCTURED_REASONING_TOKENS
+        max_tokens = TokenCounter.budget_max_tokens(self.model, prompt_tokens, requested)
+        logger.info(f"Prompt tokens: ~{prompt_tokens}, completion budget: {max_tokens}")
+        options = {**options, "max_tokens": max_tokens}
+
         # Define processing logic for retry
         async def run_processing():
+            if structured:
+                logger.info(f"Using structured Groq output for {intent.value}")
+                return await self._process_structured(text, intent, options)
             # Route to crewAI agent when confidence is high and crewAI is available
             if confidence > 0.7 and intent != IntentType.CUSTOM and _check_crewai():
                 logger.info(f"Routing to crewAI agent for {intent.value}")
-                return await self._process_with_crew(text, intent, options)
+                return (*await self._process_with_crew(text, intent, options), None)
             else:
                 logger.info("Using direct Groq API call")
-                return await self._process_with_groq(text, intent, options)
+                return (*await self._process_with_groq(text, intent, options), None)
 
         # Execute with retry logic
-        result, tokens = await RetryHandler.retry_with_backoff(
+        result, usage, structured_result = await RetryHandler.retry_with_backoff(
             run_processing,
             max_retries=2,
             initial_delay=1.0,
-            exceptions=(Exception,)
+            exceptions=(Exception,),
+            non_retryable=(UpstreamResponseError,)
         )
 
         processing_time = time.time() - start_time
@@ -79,14 +138,21 @@ class NLPProcessor:
             intent=intent.value,
             result=result,
             model=self.model,
-            tokens_used=tokens,
+            tokens_used=usage.total_tokens,
+            usage=usage,
+            structured=structured_result,
             processing_time=round(processing_time, 2),
-            metadata={"confidence": confidence, "model_name": self.model_config["name"]}
+            metadata={
+                "confidence": confidence,
+                "model_name": self.model_config["name"],
+                "upstream_latency": round(self.upstream_latency, 4),
+                "route": self.route,
+            }
         )
 
     async def _process_with_crew(
         self, text: str, intent: IntentType, options: Dict[str, Any]
-    ) -> tuple[str, int]:
+    ) -> tuple[str, TokenUsage]:
         """Process using crewAI agents"""
         try:
             from crewai import Agent, Crew, Task
@@ -108,7 +174,7 @@ class NLPProcessor:
                 backstory=self._get_agent_backstory(intent),
                 verbose=False,
                 allow_delegation=False,
-                llm=self._create_llm_config(),
+                llm=self._create_llm_config(options.get("max_tokens")),
                 tools=tools,
                 allow_code_execution=options.get('enable_code', False)
             )
@@ -128,13 +194,14 @@ class NLPProcessor:
             )
 
             # Run blocking kickoff in a separate thread
-            result = await asyncio.to_thread(crew.kickoff)
+            result = await self._timed_upstream(asyncio.to_thread(crew.kickoff))
 
             result_text = str(result) if result else "No result generated"
-            tokens = len(text.split()) + len(result_text.split())
+            usage = self._crew_usage(result, text, intent, result_text)
 
             logger.info("CrewAI execution completed successfully")
-            return result_text, tokens
+            self.route = "crew"
+            return result_text, usage
 
         except ImportError:
             logger.warning("crewAI not available, falling back to direct Groq API")
@@ -146,7 +213,7 @@ class NLPProcessor:
 
     async def _process_with_groq(
         self, text: str, intent: IntentType, options: Dict[str, Any]
-    ) -> tuple[str, int]:
+    ) -> tuple[str, TokenUsage]:
         """Process using direct Groq API call with model-specific configuration"""
         try:
             system_prompt = IntentDetector.get_system_prompt(intent)
@@ -156,12 +223,6 @@ class NLPProcessor:
             if temp is None:
                 temp = self.model_config["default_temperature"]
 
-            max_t = options.get("max_tokens")
-            if max_t is None:
-                max_t = self.model_config["max_tokens"]
-            else:
-                max_t = min(max_t, self.model_config["max_tokens"])
-
             request_params = {
                 "model": self.model,
                 "messages": [
@@ -169,7 +230,7 @@ class NLPProcessor:
                     {"role": "user", "content": text}
                 ],
                 "temperature": temp,
-                "max_tokens": max_t,
+                "max_tokens": options["max_tokens"],
                 "top_p": options.get("top_p") or 1,
                 "stream": False,
             }
@@ -177,25 +238,140 @@ class NLPProcessor:
             logger.info(f"Calling Groq API with model: {self.model}")
             logger.info(f"Temperature: {request_params['temperature']}, Max tokens: {request_params['max_tokens']}")
 
-            response = await self.groq_client.chat.completions.create(**request_params)
+            response = await self._timed_upstream(
+                self.groq_client.chat.completions.create(**request_params)
+            )
 
             result = response.choices[0].message.content
-            tokens = response.usage.total_tokens if response.usage else 0
+            if response.usage:
+                usage = TokenUsage(
+                    prompt_tokens=response.usage.prompt_tokens,
+                    completion_tokens=response.usage.completion_tokens,
+                    total_tokens=response.usage.total_tokens,
+                )
+            else:
+                usage = self._estimate_usage(request_params["messages"], result)
 
-            logger.info(f"Received response: {tokens} tokens used")
-            return result, tokens
+            logger.info(f"Received response: {usage.total_tokens} tokens used")
+            self.route = "groq"
+            return result, usage
 
         except Exception as e:
             logger.error(f"Groq API error: {e}")
             raise
 
-    def _create_llm_config(self):
+    async def _process_structured(
+        self, text: str, intent: IntentType, options: Dict[str, Any]
+    ) -> tuple[str, TokenUsage, Any]:
+        """Process using Groq JSON mode and validate into a typed result"""
+        messages = [
+            {"role": "system", "content": IntentDetector.get_structured_prompt(intent)},
+            {"role": "user", "content": text}
+        ]
+
+        request_params = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": 0,
+            "max_tokens": options["max_tokens"],
+            "response_format": {"type": "json_object"},
+            "stream": False,
+        }
+        if self.model_config["supports_reasoning"]:
+            request_params["reasoning_effort"] = STRUCTURED_REASONING_EFFORT
+
+        response = await self._timed_upstream(self.groq_client.chat.completions.create(**request_params))
+
+        content = response.choices[0].message.content or ""
+        try:
+            structured = STRUCTURED_RESULTS[intent].model_validate_json(content)
+        except ValidationError as e:
+            # A deterministic bad reply won't improve on retry; report it as an upstream failure
+            logger.error(f"Structured output failed validation: {e}")
+            raise UpstreamResponseError("Model returned an invalid structured response") from e
+
+        if isinstance(structured, EntityExtractionResult):
+            self._locate_entities(text, structured)
+
+        if response.usage:
+            usage = TokenUsage(
+                prompt_tokens=response.usage.prompt_tokens,
+                completion_tokens=response.usage.completion_tokens,
+                total_tokens=response.usage.total_tokens,
+            )
+        else:
+            usage = self._estimate_usage(messages, content)
+
+        logger.info(f"Received structured response: {usage.total_tokens} tokens used")
+        self.route = "structured"
+        return structured.model_dump_json(), usage, structured
+
+    async def _timed_upstream(self, call: Awaitable[T]) -> T:
+        """Await an upstream call, recording how long it took"""
+        start = time.monotonic()
+        try:
+            return await call
+        finally:
+            self.upstream_latency = time.monotonic() - start
+
+    @staticmethod
+    def _structured_max_tokens(intent: IntentType, prompt_tokens: int, requested: int) -> int:
+        """Derive a small completion cap for structured output"""
+        if intent == IntentType.SENTIMENT:
+            cap = SENTIMENT_MAX_TOKENS
+        else:
+            cap = min(ENTITY_MAX_TOKENS, max(ENTITY_MIN_TOKENS, prompt_tokens // 2))
+        return min(requested, cap)
+
+    @staticmethod
+    def _locate_entities(text: str, result: EntityExtractionResult) -> None:
+        """Fill entity spans by searching the input, in order of appearance"""
+        cursor = 0
+        for entity in result.entities:
+            start = text.find(entity.text, cursor)
+            if start == -1:
+                start = text.find(entity.text)
+            if start == -1:
+                entity.start = entity.end = None
+                continue
+            entity.start, entity.end = start, start + len(entity.text)
+            cursor = entity.end
+
+    def _estimate_usage(self, messages: List[Dict[str, str]], result: str) -> TokenUsage:
+        """Estimate token usage locally when upstream doesn't report it"""
+        prompt_tokens = TokenCounter.count_messages(self.model, messages)
+        completion_tokens = TokenCounter.count(self.model, result or "")
+        return TokenUsage(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+            estimated=True,
+        )
+
+    def _crew_usage(self, result: Any, text: str, intent: IntentType, result_text: str) -> TokenUsage:
+        """Get token usage reported by crewAI, falling back to a local estimate"""
+        metrics = getattr(result, "token_usage", None)
+        if metrics is not None and getattr(metrics, "total_tokens", 0):
+            return TokenUsage(
+                prompt_tokens=metrics.prompt_tokens,
+                completion_tokens=metrics.completion_tokens,
+                total_tokens=metrics.total_tokens,
+            )
+
+        messages = [
+            {"role": "system", "content": self._get_agent_backstory(intent)},
+            {"role": "user", "content": text},
+        ]
+        return self._estimate_usage(messages, result_text)
+
+    def _create_llm_config(self, max_tokens: Optional[int] = None):
         """Create LLM configuration for crewAI"""
         from langchain_openai import ChatOpenAI
         return ChatOpenAI(
-            openai_api_base="https://api.groq.com/openai/v1",
+            openai_api_base=f"{settings.groq_base_url or 'https://api.groq.com'}/openai/v1",
             openai_api_key=self.api_key,
-            model=self.model
+            model=self.model,
+            max_tokens=max_tokens
         )
 
     def _get_agent_role(self, intent: IntentType) -> str:
@@ -0,0 +1,336 @@
+"""
+Replay captured traffic against a local instance
+
+Usage (from backend/):
+    # Groq stand-in that answers with the recorded latencies and token counts
+    python -m app.replay stub traffic.jsonl --port 9100
+
+    # Instance under test, pointed at the stand-in with rate limiting relaxed
+    GROQ_BASE_URL=http://127.0.0.1:9100 RATE_LIMIT_PER_MINUTE=100000 uvicorn app.main:app
+
+    # Re-drive the trace at 1x (or accelerated) speed and compare two builds
+    python -m app.replay run traffic.jsonl --target http://127.0.0.1:8000 --speed 4 --out build-a.jsonl
+    python -m app.replay diff build-a.jsonl build-b.jsonl
+"""
+import argparse
+import asyncio
+import json
+import logging
+import re
+import sys
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Used for records without a key hash; others get one synthetic key per recorded key
+REPLAY_API_KEY = "gsk_replay_0000000000"
+MARKER_PATTERN = re.compile(r"\[replay:(\d+)\]")
+
+# Prefixes that make IntentDetector reproduce the recorded intent and confidence,
+# so replayed requests take the same crewAI / direct Groq route as the originals
+INTENT_PREFIXES = {
+    "summarization": {0.5: "Summary: ", 1.0: "Summarize this: "},
+    "translation": {
+        0.5: "Translate this into spanish: ",
+        1.0: "Translate this into spanish, english to spanish: ",
+    },
+    "sentiment": {
+        0.33: "Describe the tone: ",
+        0.67: "Analyze the sentiment of this: ",
+        1.0: "Analyze the sentiment, positive or negative analysis: ",
+    },
+    "entity_extraction": {0.5: "Extract the names: ", 1.0: "Extract the names, named entity recognition: "},
+    "text_generation": {0.5: "Compose this: ", 1.0: "Write an article about this: "},
+    "custom": {0.5: "Please help with this: "},
+}
+FILLER = "lorem ipsum dolor sit amet "
+
+# Canned JSON bodies for structured-output requests
+STRUCTURED_REPLIES = {
+    "sentiment": '{"label": "neutral", "score": 0.5}',
+    "entity": '{"entities": []}',
+    "invalid": '{}',
+}
+
+
+def load_trace(path: str) -> List[Dict[str, Any]]:
+    """
+    Load processing records from a capture file, ordered by arrival
+
+    Failed requests are kept too: they were part of the offered load, and the
+    replay compares their outcome with the recorded status.
+    """
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            if "text_len" in entry:
+                records.append(entry)
+    records.sort(key=lambda r: r["ts"])
+    return records
+
+
+def replay_api_key(record: Dict[str, Any]) -> str:
+    """Synthetic API key standing in for the recorded one, so per-tenant fairness is preserved"""
+    key_hash = record.get("key_hash")
+    return f"gsk_replay_{key_hash}" if key_hash else REPLAY_API_KEY
+
+
+def synthesize_text(index: int, record: Dict[str, Any]) -> str:
+    """Build stand-in input text with the recorded length and intent"""
+    prefixes = INTENT_PREFIXES.get(record.get("intent"), INTENT_PREFIXES["custom"])
+    confidence = record.get("confidence")
+    if confidence is None:
+        confidence = max(prefixes)
+    prefix = prefixes[min(prefixes, key=lambda c: abs(c - confidence))]
+    head = f"[replay:{index}] " + prefix
+    length = max(record["text_len"], len(head) + 1)
+    repeats = (length - len(head)) // len(FILLER) + 1
+    return (head + FILLER * repeats)[:length].strip()
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def create_stub_app(records: List[Dict[str, Any]], speed: float = 1.0):
+    """Create an OpenAI-compatible Groq stand-in driven by the recorded trace"""
+    from fastapi import FastAPI, Request
+    from fastapi.responses import JSONResponse
+
+    stub = FastAPI(title="Groq replay stand-in")
+    served = set()
+
+    @stub.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        messages = body.get("messages", [])
+        user_content = next(
+            (m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), ""
+        )
+
+        match = MARKER_PATTERN.search(user_content)
+        record = records[int(match.group(1))] if match and int(match.group(1)) < len(records) else {}
+
+        # The recorded latency covers the whole upstream exchange (several LLM calls for
+        # crewAI), so only the first call for a request waits
+        if match and match.group(1) not in served:
+            served.add(match.group(1))
+            await asyncio.sleep((record.get("upstream_latency") or 0.0) / speed)
+
+        # Reproduce upstream failures so replayed requests fail the way the originals did
+        if record.get("status") == 500:
+            return JSONResponse(status_code=500, content={"error": {"message": "Replayed upstream failure"}})
+
+        prompt_tokens = record.get("prompt_tokens") or len(user_content) // 4
+        completion_tokens = record.get("completion_tokens") or 16
+
+        if (body.get("response_format") or {}).get("type") == "json_object":
+            system_content = messages[0].get("content", "") if messages else ""
+            if record.get("status") == 502:
+                content = STRUCTURED_REPLIES["invalid"]
+            else:
+                content = STRUCTURED_REPLIES["sentiment" if "sentiment" in system_content else "entity"]
+        else:
+            content = (FILLER * (completion_tokens // 4 + 1)).strip()
+            if record.get("route") == "crew":
+                # crewAI agents parse a ReAct-style reply and re-prompt until they find a final answer
+                content = f"Thought: I now can give a great answer\nFinal Answer: {content}"
+
+        return {
+            "id": f"replay-{match.group(1) if match else 'unmatched'}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    return stub
+
+
+def build_request(index: int, record: Dict[str, Any]) -> Dict[str, Any]:
+    """httpx request arguments matching the recorded endpoint's content type"""
+    text = synthesize_text(index, record)
+    api_key = replay_api_key(record)
+    model = record.get("model")
+    options = record.get("options", {})
+    content_type = record.get("content_type", "application/json")
+
+    if content_type == "text/plain":
+        params = {"options": json.dumps(options)}
+        if model:
+            params["model"] = model
+        return {
+            "content": text.encode("utf-8"),
+            "headers": {"Content-Type": "text/plain", "X-Groq-Api-Key": api_key},
+            "params": params,
+        }
+    if content_type == "multipart/form-data":
+        data = {"api_key": api_key, "options": json.dumps(options)}
+        if model:
+            data["model"] = model
+        return {"files": {"file": ("replay.txt", text.encode("utf-8"), "text/plain")}, "data": data}
+
+    return {"json": {"text": text, "api_key": api_key, "model": model, "options": options}}
+
+
+async def replay(records: List[Dict[str, Any]], target: str, speed: float = 1.0,
+                 timeout: float = 120.0) -> List[Dict[str, Any]]:
+    """Re-drive the trace against target, preserving (scaled) inter-arrival times"""
+    import httpx
+
+    results: List[Dict[str, Any]] = []
+    if not records:
+        return results
+
+    trace_start = records[0]["ts"]
+    run_start = time.monotonic()
+
+    async with httpx.AsyncClient(base_url=target, timeout=timeout) as client:
+
+        async def send(index: int, record: Dict[str, Any]):
+            offset = (record["ts"] - trace_start) / speed
+            await asyncio.sleep(max(0.0, offset - (time.monotonic() - run_start)))
+
+            request = build_request(index, record)
+            sent = time.monotonic()
+            try:
+                response = await client.post(record.get("path", "/api/process"), **request)
+                status_code = response.status_code
+            except httpx.HTTPError as e:
+                logger.warning(f"Request {index} failed: {e}")
+                status_code = 0
+
+            results.append({
+                "index": index,
+                "offset": round(offset, 6),
+                "lag": round(sent - run_start - offset, 6),
+                "status": status_code,
+                "recorded_status": record.get("status"),
+                "latency": round(time.monotonic() - sent, 6),
+                "recorded_latency": record.get("duration"),
+            })
+
+        await asyncio.gather(*(send(i, r) for i, r in enumerate(records)))
+
+    results.sort(key=lambda r: r["index"])
+    return results
+
+
+def summarize(results: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Latency distribution summary for successful requests, plus error and status-mismatch counts"""
+    latencies = [r["latency"] for r in results if r["status"] == 200]
+    return {
+        "requests": len(results),
+        "errors": len(results) - len(latencies),
+        "mismatched": sum(
+            1 for r in results if r.get("recorded_status") is not None and r["status"] != r["recorded_status"]
+        ),
+        "mean": sum(latencies) / len(latencies) if latencies else 0.0,
+        "p50": percentile(latencies, 50),
+        "p90": percentile(latencies, 90),
+        "p99": percentile(latencies, 99),
+        "max": max(latencies, default=0.0),
+    }
+
+
+def load_results(path: str) -> List[Dict[str, Any]]:
+    """Load replay results written by the run command"""
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def format_diff(baseline: Dict[str, float], candidate: Dict[str, float]) -> str:
+    """Render a side-by-side comparison of two latency summaries"""
+    lines = [f"{'metric':<10}{'baseline':>12}{'candidate':>12}{'delta':>12}{'change':>10}"]
+    for metric in ("requests", "errors", "mismatched", "mean", "p50", "p90", "p99", "max"):
+        a, b = baseline[metric], candidate[metric]
+        change = f"{(b - a) / a * 100:+.1f}%" if a else "n/a"
+        if isinstance(a, int):
+            lines.append(f"{metric:<10}{a:>12d}{b:>12d}{b - a:>+12d}{change:>10}")
+        else:
+            lines.append(f"{metric:<10}{a:>12.4f}{b:>12.4f}{b - a:>+12.4f}{change:>10}")
+    return "\n".join(lines)
+
+
+def format_status_diff(baseline: List[Dict[str, Any]], candidate: List[Dict[str, Any]]) -> str:
+    """Render per-status request counts of two runs"""
+    a_counts = Counter(r["status"] for r in baseline)
+    b_counts = Counter(r["status"] for r in candidate)
+    lines = [f"{'status':<10}{'baseline':>12}{'candidate':>12}{'delta':>12}"]
+    for code in sorted(a_counts.keys() | b_counts.keys()):
+        a, b = a_counts[code], b_counts[code]
+        lines.append(f"{code:<10}{a:>12d}{b:>12d}{b - a:>+12d}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.replay", description="Replay captured traffic")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    stub_cmd = commands.add_parser("stub", help="Run the Groq stand-in")
+    stub_cmd.add_argument("trace")
+    stub_cmd.add_argument("--host", default="127.0.0.1")
+    stub_cmd.add_argument("--port", type=int, default=9100)
+    stub_cmd.add_argument("--speed", type=float, default=1.0, help="Divide recorded upstream latency by this")
+
+    run_cmd = commands.add_parser("run", help="Re-drive a trace against a local instance")
+    run_cmd.add_argument("trace")
+    run_cmd.add_argument("--target", default="http://127.0.0.1:8000")
+    run_cmd.add_argument("--speed", type=float, default=1.0, help="Arrival-rate multiplier (1 = real time)")
+    run_cmd.add_argument("--out", required=True, help="Where to write per-request results")
+
+    diff_cmd = commands.add_parser("diff", help="Compare latency and status distributions of two runs")
+    diff_cmd.add_argument("baseline")
+    diff_cmd.add_argument("candidate")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    if args.command == "stub":
+        import uvicorn
+        records = load_trace(args.trace)
+        logger.info(f"Serving {len(records)} recorded responses on {args.host}:{args.port}")
+        uvicorn.run(create_stub_app(records, args.speed), host=args.host, port=args.port)
+
+    elif args.command == "run":
+        records = load_trace(args.trace)
+        logger.info(f"Replaying {len(records)} requests against {args.target} at {args.speed}x")
+        results = asyncio.run(replay(records, args.target, args.speed))
+        with open(args.out, "w", encoding="utf-8") as f:
+            for result in results:
+                f.write(json.dumps(result, separators=(",", ":")) + "\n")
+        print(f"{'metric':<10}{'value':>12}")
+        for metric, value in summarize(results).items():
+            print(f"{metric:<10}{value:>12.4f}" if isinstance(value, float) else f"{metric:<10}{value:>12d}")
+
+    elif args.command == "diff":
+        baseline, candidate = load_results(args.baseline), load_results(args.candidate)
+        print(format_diff(summarize(baseline), summarize(candidate)))
+        print()
+        print(format_status_diff(baseline, candidate))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -17,7 +17,8 @@ class RetryHandler:
         max_retries: int = 3,
         initial_delay: float = 1.0,
         backoff_factor: float = 2.0,
-        exceptions: tuple = (Exception,)
+        exceptions: tuple = (Exception,),
+        non_retryable: tuple = ()
     ) -> T:
         """
         Retry a function with exponential backoff
@@ -28,6 +29,7 @@ class RetryHandler:
             initial_delay: Initial delay in seconds
             backoff_factor: Multiplier for delay after each retry
             exceptions: Tuple of exceptions to catch and retry
+            non_retryable: Tuple of exceptions to re-raise immediately, even if in exceptions
 
         Returns:
             Result of the function call
@@ -44,6 +46,9 @@ class RetryHandler:
             except exceptions as e:
                 last_exception = e
 
+                if isinstance(e, non_retryable):
+                    raise
+
                 if attempt == max_retries:
                     logger.error(f"All {max_retries} retry attempts failed: {e}")
                     raise
@@ -0,0 +1,90 @@
+"""
+Production server launcher
+
+Usage (from backend/):
+    python -m app.server
+
+Runs gunicorn as the process manager with uvicorn workers on uvloop/httptools.
+The app (and optionally crewAI) is imported once in the master before forking so
+workers share those memory pages copy-on-write. Workers are recycled after
+WORKER_MAX_REQUESTS requests or once they exceed WORKER_MAX_RSS_MB, and SIGTERM
+drains in-flight and streaming responses for up to GRACEFUL_TIMEOUT seconds.
+"""
+import logging
+import multiprocessing
+
+from gunicorn.app.base import BaseApplication
+from uvicorn_worker import UvicornWorker
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Worker(UvicornWorker):
+    """Uvicorn worker pinned to the fast event loop and HTTP parser"""
+
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools", "lifespan": "on"}
+
+    def init_process(self):
+        from app.worker_health import worker_health
+
+        # Runs in the forked worker: gunicorn replaces it if it exits, so it may self-recycle
+        worker_health.managed = True
+        super().init_process()
+
+
+class ProductionServer(BaseApplication):
+    """Gunicorn application serving a preloaded ASGI app"""
+
+    def __init__(self, application, options: dict):
+        self.application = application
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        return self.application
+
+
+def get_worker_count() -> int:
+    """Configured worker count, defaulting to one per CPU"""
+    return settings.web_concurrency or multiprocessing.cpu_count()
+
+
+def build_options() -> dict:
+    """Gunicorn settings derived from application configuration"""
+    return {
+        "bind": f"{settings.api_host}:{settings.api_port}",
+        "workers": get_worker_count(),
+        "worker_class": Worker,
+        "preload_app": True,
+        "max_requests": settings.worker_max_requests,
+        "max_requests_jitter": settings.worker_max_requests_jitter,
+        "graceful_timeout": settings.graceful_timeout,
+        "timeout": settings.worker_timeout,
+        "keepalive": settings.keepalive_timeout,
+        "loglevel": settings.log_level.lower(),
+        "accesslog": None,
+    }
+
+
+def main():
+    # Import the app in the master so its modules are shared with every worker
+    from app.main import app
+
+    if settings.preload_crewai:
+        from app.processor import _check_crewai
+        if _check_crewai():
+            logger.info("Preloaded crewAI before forking workers")
+
+    options = build_options()
+    logger.info(f"Starting {options['workers']} workers on {options['bind']}")
+    ProductionServer(app, options).run()
+
+
+if __name__ == "__main__":
+    main()
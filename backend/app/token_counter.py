@@ -0,0 +1,142 @@
+import logging
+import math
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from app.models import IntentType
+from app.models_config import get_model_config
+
+logger = logging.getLogger(__name__)
+
+# Each tokenizer family maps to the closest tiktoken BPE encoding plus a
+# chars-per-token ratio used by the length estimator when the encoding can't be
+# loaded locally (e.g. no network to fetch the BPE file on first use).
+TOKENIZER_FAMILIES = {
+    "o200k": {"encoding": "o200k_base", "chars_per_token": 4.2},
+    "llama3": {"encoding": "cl100k_base", "chars_per_token": 4.0},
+    "mistral": {"encoding": None, "chars_per_token": 3.5},
+    "gemma": {"encoding": None, "chars_per_token": 3.8},
+}
+
+DEFAULT_FAMILY = "llama3"
+
+# Chat template overhead (role markers, separators) per message and for the reply primer
+TOKENS_PER_MESSAGE = 4
+TOKENS_REPLY_PRIMER = 3
+
+# Headroom kept free in the context window to absorb estimator error
+SAFETY_MARGIN_RATIO = 0.05
+MIN_SAFETY_MARGIN = 16
+
+# Default completion budget per intent when the caller sets no max_tokens:
+# (floor, tokens per input token, ceiling)
+DEFAULT_COMPLETION_BUDGETS = {
+    IntentType.SUMMARIZATION: (256, 0.3, 2048),
+    IntentType.TRANSLATION: (256, 1.5, 16384),
+    IntentType.SENTIMENT: (256, 0.0, 256),
+    IntentType.ENTITY_EXTRACTION: (256, 0.5, 4096),
+    IntentType.TEXT_GENERATION: (4096, 0.0, 4096),
+    IntentType.CUSTOM: (4096, 0.0, 4096),
+}
+
+# Extra room for hidden reasoning tokens, which count against max_tokens
+REASONING_HEADROOM = 2048
+
+_PUNCTUATION_PATTERN = re.compile(r"[^\w\s]")
+
+# Long inputs are encoded in whitespace-aligned chunks so the token id list for a
+# large upload never has to exist all at once
+ENCODE_CHUNK_CHARS = 8192
+
+
+@lru_cache(maxsize=None)
+def _load_encoding(encoding_name: Optional[str]):
+    """Load and cache a tiktoken encoding, or None when unavailable"""
+    if encoding_name is None:
+        return None
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(encoding_name)
+    except Exception as e:
+        logger.warning(f"Tokenizer '{encoding_name}' not available ({e}) — using heuristic token estimates")
+        return None
+
+
+def _iter_chunks(text: str):
+    """Yield slices of text, split before a space so words aren't cut in half"""
+    start = 0
+    while start < len(text):
+        end = start + ENCODE_CHUNK_CHARS
+        if end < len(text):
+            split = text.rfind(" ", start + 1, end)
+            if split != -1:
+                end = split
+        yield text[start:end]
+        start = end
+
+
+class TokenCounter:
+    """Counts tokens locally so requests can be budgeted before calling Groq"""
+
+    @staticmethod
+    def get_family(model: str) -> str:
+        """Get tokenizer family for a model"""
+        family = get_model_config(model).get("tokenizer", DEFAULT_FAMILY)
+        return family if family in TOKENIZER_FAMILIES else DEFAULT_FAMILY
+
+    @classmethod
+    def count(cls, model: str, text: str) -> int:
+        """Count tokens in text using the model's tokenizer family"""
+        if not text:
+            return 0
+
+        family = TOKENIZER_FAMILIES[cls.get_family(model)]
+        encoding = _load_encoding(family["encoding"])
+        if encoding is not None:
+            return sum(len(encoding.encode(chunk, disallowed_special=())) for chunk in _iter_chunks(text))
+
+        # Words merge into multi-character tokens but punctuation is usually a token
+        # of its own; counting matches lazily avoids materializing large inputs
+        punctuation = sum(1 for _ in _PUNCTUATION_PATTERN.finditer(text))
+        return math.ceil((len(text) - punctuation) / family["chars_per_token"]) + punctuation
+
+    @classmethod
+    def count_messages(cls, model: str, messages: List[Dict[str, str]]) -> int:
+        """Count prompt tokens for a list of chat messages"""
+        total = TOKENS_REPLY_PRIMER
+        for message in messages:
+            total += TOKENS_PER_MESSAGE + cls.count(model, message.get("content", ""))
+        return total
+
+    @staticmethod
+    def default_max_tokens(model: str, intent: IntentType, input_tokens: int) -> int:
+        """Derive a completion budget from the intent and input size"""
+        floor, ratio, ceiling = DEFAULT_COMPLETION_BUDGETS.get(
+            intent, DEFAULT_COMPLETION_BUDGETS[IntentType.CUSTOM]
+        )
+        budget = min(ceiling, max(floor, math.ceil(input_tokens * ratio)))
+        if get_model_config(model)["supports_reasoning"]:
+            budget += REASONING_HEADROOM
+        return budget
+
+    @staticmethod
+    def budget_max_tokens(model: str, prompt_tokens: int, requested: int) -> int:
+        """
+        Clamp completion tokens to what fits in the model's context window
+
+        Raises:
+            ValueError: If the prompt leaves no room for a completion
+        """
+        config = get_model_config(model)
+        context_window = config.get("context_window", config["max_tokens"])
+        margin = max(MIN_SAFETY_MARGIN, math.ceil(prompt_tokens * SAFETY_MARGIN_RATIO))
+        available = context_window - prompt_tokens - margin
+
+        if available <= 0:
+            raise ValueError(
+                f"Input is too long for {model}: ~{prompt_tokens} prompt tokens leave no room "
+                f"for a response in the {context_window}-token context window"
+            )
+
+        return min(requested, config["max_tokens"], available)
@@ -0,0 +1,104 @@
+import hashlib
+import json
+import logging
+import queue
+import threading
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Options that describe request shape; anything else is dropped from the trace
+CAPTURED_OPTIONS = ("temperature", "max_tokens", "top_p", "enable_search", "enable_code", "structured_output")
+
+
+def fingerprint(value: str) -> str:
+    """Short, non-reversible hash used in place of keys and texts"""
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()[:12]
+
+
+class TrafficRecorder:
+    """
+    Appends redacted request-shape records to a JSON Lines trace file
+
+    Records are handed to a background thread so disk writes never block the
+    event loop; close() drains whatever is still queued.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_lines, name="traffic-capture", daemon=True)
+        self._writer.start()
+        logger.info(f"Traffic capture enabled, writing to {path}")
+
+    @staticmethod
+    def describe_request(text: str, api_key: str, model: Optional[str], options: Dict[str, Any],
+                         content_type: str = "application/json") -> Dict[str, Any]:
+        """Build the redacted shape of an incoming processing request"""
+        return {
+            "content_type": content_type,
+            "text_len": len(text),
+            "text_hash": fingerprint(text),
+            "key_hash": fingerprint(api_key),
+            "model": model,
+            "options": {k: options[k] for k in CAPTURED_OPTIONS if options.get(k) is not None},
+        }
+
+    @staticmethod
+    def describe_response(response: Any) -> Dict[str, Any]:
+        """Extract intent, routing, upstream latency and token counts from a ProcessResponse"""
+        usage = response.usage
+        metadata = response.metadata or {}
+        return {
+            "intent": response.intent,
+            "confidence": metadata.get("confidence"),
+            "route": metadata.get("route"),
+            "model": response.model,
+            "upstream_latency": metadata.get("upstream_latency"),
+            "prompt_tokens": usage.prompt_tokens if usage else None,
+            "completion_tokens": usage.completion_tokens if usage else None,
+        }
+
+    def record(self, method: str, path: str, status_code: int, started: float, duration: float,
+               capture: Dict[str, Any]) -> None:
+        """Queue one request record for the trace"""
+        entry = {
+            "ts": round(started, 6),
+            "method": method,
+            "path": path,
+            "status": status_code,
+            "duration": round(duration, 6),
+            **capture,
+        }
+        self._queue.put(json.dumps(entry, separators=(",", ":")) + "\n")
+
+    def _write_lines(self) -> None:
+        while True:
+            line = self._queue.get()
+            if line is None:
+                break
+            try:
+                self._file.write(line)
+                # Flush once the backlog is written rather than after every line
+                if self._queue.empty():
+                    self._file.flush()
+            except OSError as e:
+                logger.error(f"Could not write traffic capture record: {e}")
+
+    def close(self) -> None:
+        """Write out queued records and close the trace file"""
+        self._queue.put(None)
+        self._writer.join()
+        self._file.close()
+
+
+def create_recorder(path: Optional[str]) -> Optional[TrafficRecorder]:
+    """Create a recorder when capture is configured, otherwise None"""
+    if not path:
+        return None
+    try:
+        return TrafficRecorder(path)
+    except OSError as e:
+        logger.error(f"Could not open traffic capture file {path}: {e}")
+        return None
@@ -0,0 +1,58 @@
+import io
+import tempfile
+from typing import BinaryIO
+
+from fastapi import Request
+
+# Uploads stay in memory up to this size, then roll over to a temp file on disk
+SPOOL_MAX_MEMORY = 1024 * 1024
+
+# Intent detection only looks at the start of an upload
+DETECTION_PREFIX_CHARS = 4096
+
+
+class UploadTooLarge(ValueError):
+    """Raised when an upload exceeds the configured size limit"""
+
+
+async def spool_request_body(request: Request, max_bytes: int) -> BinaryIO:
+    """Stream the raw request body into a spooled temp file without buffering it whole"""
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > max_bytes:
+        raise UploadTooLarge(f"Upload exceeds the {max_bytes}-byte limit")
+
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+    size = 0
+    try:
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLarge(f"Upload exceeds the {max_bytes}-byte limit")
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+
+    spool.seek(0)
+    return spool
+
+
+def read_text(file: BinaryIO, max_bytes: int) -> str:
+    """
+    Decode an uploaded file into a single string
+
+    Spools still held in memory are decoded in place; spools rolled over to disk
+    are read once and the bytes released as soon as they are decoded.
+    """
+    file.seek(0, io.SEEK_END)
+    if file.tell() > max_bytes:
+        raise UploadTooLarge(f"Upload exceeds the {max_bytes}-byte limit")
+
+    # SpooledTemporaryFile keeps small uploads in a BytesIO until it rolls over
+    buffer = getattr(file, "_file", file)
+    if isinstance(buffer, io.BytesIO):
+        with buffer.getbuffer() as view:
+            return str(view, "utf-8", "replace")
+
+    file.seek(0)
+    return file.read().decode("utf-8", errors="replace")
@@ -0,0 +1,126 @@
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from typing import Any, Dict
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# How often (in completed requests) to sample RSS for the memory recycle check
+RSS_CHECK_INTERVAL = 50
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in MB"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        # Peak RSS is the best portable fallback (KB on Linux, bytes on macOS)
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class WorkerHealth:
+    """Tracks request load for this worker process and recycles it past the memory limit"""
+
+    def __init__(self):
+        # Set by the production server's worker class; only then is self-recycling safe,
+        # because a process manager is there to start a replacement
+        self.managed = False
+        self._reset()
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self.started = time.time()
+        self.requests = 0
+        self.in_flight = 0
+        self.draining = False
+
+    def _ensure_current_process(self):
+        # The app is preloaded before forking, so state created in the master must be reset
+        if self.pid != os.getpid():
+            self._reset()
+
+    def request_started(self) -> None:
+        """Mark a request as in flight"""
+        self._ensure_current_process()
+        self.in_flight += 1
+
+    def request_finished(self) -> None:
+        """Mark a request as done and recycle the worker if it has grown too large"""
+        self.in_flight -= 1
+        self.requests += 1
+
+        limit = settings.worker_max_rss_mb
+        if self.managed and limit and not self.draining and self.requests % RSS_CHECK_INTERVAL == 0:
+            rss = current_rss_mb()
+            if rss > limit:
+                logger.warning(f"Worker {self.pid} RSS {rss:.0f}MB exceeds {limit}MB — draining for restart")
+                self.draining = True
+                # Triggers the server's graceful shutdown; the process manager starts a replacement
+                os.kill(self.pid, signal.SIGTERM)
+
+    def install_drain_hook(self) -> None:
+        """
+        Report draining as soon as SIGTERM arrives
+
+        Must run after the server has installed its own signal handlers (e.g. from the
+        lifespan startup), since it chains to the existing SIGTERM handler. Signal
+        handlers can only be set from the main thread, so elsewhere (e.g. a test
+        client running the app in a worker thread) this is a no-op.
+        """
+        if threading.current_thread() is not threading.main_thread():
+            logger.debug("Not in the main thread — SIGTERM drain reporting disabled")
+            return
+
+        previous = signal.getsignal(signal.SIGTERM)
+        if not callable(previous):
+            return
+
+        def handle_sigterm(signum, frame):
+            self.draining = True
+            previous(signum, frame)
+
+        try:
+            signal.signal(signal.SIGTERM, handle_sigterm)
+        except ValueError as e:
+            logger.warning(f"Could not install SIGTERM drain hook: {e}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Health details for this worker"""
+        self._ensure_current_process()
+        return {
+            "pid": self.pid,
+            "uptime": round(time.time() - self.started, 2),
+            "requests": self.requests,
+            "in_flight": self.in_flight,
+            "rss_mb": round(current_rss_mb(), 1),
+            "draining": self.draining,
+        }
+
+
+worker_health = WorkerHealth()
+
+
+class WorkerLoadMiddleware:
+    """ASGI middleware counting requests in flight until their response body is fully sent"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        worker_health.request_started()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            worker_health.request_finished()
@@ -0,0 +1,31 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app import processor
+
+
+class FakeGroq:
+    """Stands in for AsyncGroq, returning canned replies and recording each request"""
+
+    reply = "ok"
+    calls = []
+
+    def __init__(self, api_key=None, base_url=None):
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **params):
+        FakeGroq.calls.append(params)
+        usage = SimpleNamespace(prompt_tokens=10, completion_tokens=5, total_tokens=15)
+        message = SimpleNamespace(content=FakeGroq.reply)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+
+@pytest.fixture
+def fake_groq(monkeypatch):
+    """Run the real NLPProcessor against FakeGroq on the direct Groq route"""
+    monkeypatch.setattr(processor, "AsyncGroq", FakeGroq)
+    monkeypatch.setattr(processor, "_crewai_available", False)
+    FakeGroq.reply = "ok"
+    FakeGroq.calls = []
+    return FakeGroq
@@ -0,0 +1,185 @@
+import asyncio
+import itertools
+
+import groq
+import httpx
+import pytest
+
+from app import main
+from app.admission import AdaptiveLimit, AdmissionController, AdmissionRejected
+
+API_KEY = "gsk_test_0000000000"
+
+
+def status_error(cls, status_code):
+    response = httpx.Response(status_code, request=httpx.Request("POST", "https://api.groq.com"))
+    return cls("upstream error", response=response, body=None)
+
+
+def single_slot_controller(max_queue=5, max_wait=1.0, weights=None):
+    return AdmissionController(AdaptiveLimit(1, 1, 1, 2.0), max_queue=max_queue, max_wait=max_wait, weights=weights)
+
+
+def run_failures(error, count=20):
+    # A clock that jumps 10s per reading, so every failure is past the decrease interval
+    limit = AdaptiveLimit(10, 1, 20, 2.0, clock=itertools.count(10, 10).__next__)
+    controller = AdmissionController(limit, max_queue=5, max_wait=0.1)
+
+    async def fail_repeatedly():
+        for _ in range(count):
+            with pytest.raises(type(error)):
+                async with controller.slot("bad", lambda: 0.05):
+                    raise error
+
+    asyncio.run(fail_repeatedly())
+    return controller.limit.current
+
+
+@pytest.mark.parametrize("error", [
+    status_error(groq.AuthenticationError, 401),
+    status_error(groq.RateLimitError, 429),
+    ValueError("input too long"),
+])
+def test_caller_errors_do_not_shrink_shared_limit(error):
+    assert run_failures(error) == 10
+
+
+def test_upstream_server_errors_shrink_limit():
+    assert run_failures(status_error(groq.InternalServerError, 500)) < 10
+
+
+def test_limit_samples_reported_upstream_latency_not_block_duration():
+    controller = AdmissionController(AdaptiveLimit(10, 1, 20, 2.0), max_queue=5, max_wait=0.1)
+
+    async def slow_block():
+        async with controller.slot("tenant", lambda: 0.01):
+            # e.g. retry backoff between upstream calls
+            await asyncio.sleep(0.05)
+
+    asyncio.run(slow_block())
+    assert controller.limit.short_latency == pytest.approx(0.01)
+
+
+def test_full_queue_sheds_with_retry_after():
+    controller = single_slot_controller(max_queue=1)
+
+    async def overfill():
+        await controller.acquire("a")
+        waiter = asyncio.create_task(controller.acquire("a"))
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire("b")
+
+        controller.release(None, failed=False)
+        await waiter
+        return rejected.value
+
+    rejected = asyncio.run(overfill())
+    assert rejected.retry_after >= 1
+    assert controller.shed == 1
+    assert controller.in_flight == 1
+
+
+def test_waiting_past_max_wait_sheds_and_leaves_queue():
+    controller = single_slot_controller(max_wait=0.05)
+
+    async def wait_too_long():
+        await controller.acquire("a")
+        with pytest.raises(AdmissionRejected):
+            await controller.acquire("b")
+
+    asyncio.run(wait_too_long())
+    assert controller.shed == 1
+    assert controller.in_flight == 1
+    assert controller.snapshot()["queued"] == 0
+
+
+def admission_order(controller, tenants):
+    """Queue one request per entry behind a held slot and return the order they're admitted in"""
+    order = []
+
+    async def request(tenant):
+        await controller.acquire(tenant)
+        order.append(tenant)
+
+    async def drain():
+        await controller.acquire("holder")
+        waiters = []
+        for tenant in tenants:
+            waiters.append(asyncio.create_task(request(tenant)))
+            await asyncio.sleep(0)
+        for _ in tenants:
+            controller.release(None, failed=False)
+            await asyncio.sleep(0)
+        await asyncio.gather(*waiters)
+
+    asyncio.run(drain())
+    return order
+
+
+def test_heavy_tenant_does_not_starve_light_tenant():
+    order = admission_order(single_slot_controller(max_queue=10), ["heavy"] * 5 + ["light"])
+
+    assert order.index("light") == 1
+
+
+def test_tenant_weights_bias_admission_order():
+    order = admission_order(single_slot_controller(max_queue=10, weights={"light": 2.0}), ["heavy"] * 5 + ["light"])
+
+    assert order[0] == "light"
+
+
+def test_cancelled_waiter_leaves_no_queue_entry():
+    controller = single_slot_controller()
+
+    async def cancel_waiter():
+        await controller.acquire("a")
+        waiter = asyncio.create_task(controller.acquire("b"))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+    asyncio.run(cancel_waiter())
+    assert controller.snapshot()["queued"] == 0
+    assert controller.in_flight == 1
+
+
+def test_waiter_cancelled_after_grant_returns_its_slot():
+    controller = single_slot_controller()
+
+    async def cancel_granted_waiter():
+        await controller.acquire("a")
+        waiter = asyncio.create_task(controller.acquire("b"))
+        await asyncio.sleep(0)
+        # Hands the slot to the waiter, which is cancelled before it resumes
+        controller.release(None, failed=False)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+    asyncio.run(cancel_granted_waiter())
+    assert controller.snapshot()["queued"] == 0
+    assert controller.in_flight == 0
+
+
+def test_shed_request_gets_503_with_retry_after(monkeypatch, fake_groq):
+    controller = single_slot_controller(max_queue=0)
+    controller.in_flight = 1
+    monkeypatch.setattr(main, "admission", controller)
+    main.limiter.enabled = False
+
+    async def post():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/api/process", json={"text": "Summarize this: hello", "api_key": API_KEY})
+
+    try:
+        response = asyncio.run(post())
+    finally:
+        main.limiter.enabled = True
+
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
+    assert fake_groq.calls == []
@@ -0,0 +1,96 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app import main, processor
+from app.models import Entity, EntityExtractionResult
+from app.processor import NLPProcessor
+
+API_KEY = "gsk_test_0000000000"
+
+def run(text, options=None, model="llama-3.3-70b-versatile"):
+    return asyncio.run(NLPProcessor(API_KEY, model).process(text, options or {}))
+
+
+def test_requested_max_tokens_is_clamped_to_model_limit(fake_groq):
+    run("Summarize this: a short note", {"max_tokens": 100_000}, model="llama-3.1-8b-instant")
+
+    assert fake_groq.calls[0]["max_tokens"] == 8192
+
+
+def test_default_max_tokens_comes_from_intent(fake_groq):
+    run("Analyze the sentiment of this: what a lovely day")
+
+    assert fake_groq.calls[0]["max_tokens"] == 256
+
+
+def test_input_over_context_window_is_rejected_before_calling_groq(fake_groq):
+    main.limiter.enabled = False
+
+    async def post():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/api/process", json={
+                "text": "Summarize this: " + "lorem ipsum dolor " * 5000,
+                "api_key": API_KEY,
+                "model": "gemma2-9b-it",
+            })
+
+    try:
+        response = asyncio.run(post())
+    finally:
+        main.limiter.enabled = True
+
+    assert response.status_code == 400
+    assert "context window" in response.json()["error"]
+    assert fake_groq.calls == []
+
+
+def test_structured_sentiment_is_validated_into_typed_result(fake_groq):
+    fake_groq.reply = '{"label": "positive", "score": 0.9}'
+
+    response = run("Analyze the sentiment of this: what a lovely day", {"structured_output": True})
+
+    assert response.structured.label == "positive"
+    assert response.metadata["route"] == "structured"
+    assert fake_groq.calls[0]["response_format"] == {"type": "json_object"}
+    assert fake_groq.calls[0]["max_tokens"] == processor.SENTIMENT_MAX_TOKENS
+
+
+def test_invalid_structured_reply_is_a_502_without_retries(fake_groq):
+    fake_groq.reply = '{"label": "ecstatic", "score": 3}'
+    main.limiter.enabled = False
+
+    async def post():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/api/process", json={
+                "text": "Analyze the sentiment of this: what a lovely day",
+                "api_key": API_KEY,
+                "options": {"structured_output": True},
+            })
+
+    try:
+        response = asyncio.run(post())
+    finally:
+        main.limiter.enabled = True
+
+    assert response.status_code == 502
+    assert len(fake_groq.calls) == 1
+
+
+def test_entity_spans_follow_order_of_appearance():
+    text = "Paris met Anna. Later Anna flew to Paris."
+    result = EntityExtractionResult(entities=[
+        Entity(text="Paris", type="LOC"),
+        Entity(text="Anna", type="PER"),
+        Entity(text="Anna", type="PER"),
+        Entity(text="Paris", type="LOC"),
+        Entity(text="Berlin", type="LOC"),
+    ])
+
+    NLPProcessor._locate_entities(text, result)
+
+    spans = [(e.start, e.end) for e in result.entities]
+    assert spans == [(0, 5), (10, 14), (22, 26), (35, 40), (None, None)]
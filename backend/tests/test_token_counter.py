@@ -0,0 +1,60 @@
+import math
+
+import pytest
+
+from app.models import IntentType
+from app.token_counter import REASONING_HEADROOM, TokenCounter
+
+# Mixtral has no local BPE encoding, so counts always come from the length estimator
+ESTIMATED_MODEL = "mixtral-8x7b-32768"
+
+
+def test_estimate_scales_with_length_not_word_count():
+    prose = "The quick brown fox jumps over the lazy dog. " * 100
+
+    # 3.5 chars per token for the mistral family, plus one token per full stop
+    expected = math.ceil((len(prose) - 100) / 3.5) + 100
+    assert TokenCounter.count(ESTIMATED_MODEL, prose) == expected
+
+
+def test_count_messages_adds_chat_template_overhead():
+    messages = [{"role": "system", "content": "abc"}, {"role": "user", "content": "abcdefg"}]
+
+    assert TokenCounter.count_messages(ESTIMATED_MODEL, messages) == 3 + (4 + 1) + (4 + 2)
+
+
+@pytest.mark.parametrize("intent, input_tokens, expected", [
+    (IntentType.SENTIMENT, 50_000, 256),
+    (IntentType.SUMMARIZATION, 100, 256),
+    (IntentType.SUMMARIZATION, 5_000, 1500),
+    (IntentType.SUMMARIZATION, 50_000, 2048),
+    (IntentType.TRANSLATION, 1_000, 1500),
+    (IntentType.ENTITY_EXTRACTION, 2_000, 1000),
+    (IntentType.TEXT_GENERATION, 10, 4096),
+])
+def test_default_max_tokens_follows_intent_and_input_size(intent, input_tokens, expected):
+    assert TokenCounter.default_max_tokens("llama-3.3-70b-versatile", intent, input_tokens) == expected
+
+
+def test_default_max_tokens_reserves_reasoning_headroom():
+    budget = TokenCounter.default_max_tokens("openai/gpt-oss-120b", IntentType.SENTIMENT, 10)
+
+    assert budget == 256 + REASONING_HEADROOM
+
+
+def test_budget_keeps_requested_tokens_that_fit():
+    assert TokenCounter.budget_max_tokens("llama-3.3-70b-versatile", 1_000, 500) == 500
+
+
+def test_budget_clamps_to_model_output_limit():
+    assert TokenCounter.budget_max_tokens("llama-3.1-8b-instant", 1_000, 50_000) == 8192
+
+
+def test_budget_clamps_to_remaining_context_window():
+    # 8192 window - 6000 prompt - 300 safety margin
+    assert TokenCounter.budget_max_tokens("gemma2-9b-it", 6_000, 4_096) == 1892
+
+
+def test_budget_rejects_prompt_that_fills_context_window():
+    with pytest.raises(ValueError, match="too long for gemma2-9b-it"):
+        TokenCounter.budget_max_tokens("gemma2-9b-it", 7_900, 256)
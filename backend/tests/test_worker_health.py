@@ -0,0 +1,45 @@
+import asyncio
+import signal
+import threading
+
+import httpx
+
+from app import main
+from app.worker_health import WorkerHealth, worker_health
+
+
+def get_health():
+    async def get():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/health")
+
+    return asyncio.run(get())
+
+
+def test_health_is_503_while_draining(monkeypatch):
+    assert get_health().status_code == 200
+
+    monkeypatch.setattr(worker_health, "draining", True)
+    response = get_health()
+
+    assert response.status_code == 503
+    assert response.json()["status"] == "draining"
+
+
+def test_drain_hook_outside_main_thread_is_a_no_op():
+    before = signal.getsignal(signal.SIGTERM)
+    errors = []
+
+    def install():
+        try:
+            WorkerHealth().install_drain_hook()
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=install)
+    thread.start()
+    thread.join()
+
+    assert errors == []
+    assert signal.getsignal(signal.SIGTERM) is before